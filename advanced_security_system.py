@@ -9,6 +9,7 @@ from collections import defaultdict, deque
 import json
 import base64
 import requests
+import aiohttp
 from datetime import datetime, timedelta
 import statistics
 import numpy as np
@@ -202,6 +203,9 @@ class AdvancedThreatDetector:
             'last_update': datetime.now() - timedelta(hours=24)  # 강제 업데이트 유도
         }
         
+        # 첨부파일 다운로드용 공유 HTTP 세션 (봇 초기화 시 주입)
+        self.http_session: Optional[aiohttp.ClientSession] = None
+        
     async def analyze_message_security(self, message_content: str, user_id: int, 
                                      channel_id: int) -> Dict[str, Any]:
         """메시지 보안 분석"""
@@ -651,6 +655,33 @@ class AdvancedThreatDetector:
             'recommended_action': 'LOCK_SERVER' if is_raid else 'MONITOR'
         }
     
+    async def analyze_raid_pattern(self, join_times: np.ndarray) -> Dict[str, Any]:
+        """가입 시각 배열 기반 레이드 패턴 분석"""
+        join_times = np.asarray(join_times, dtype=np.float64)
+        current_time = time.time()
+        
+        # 시간 창 내 가입자만 추출
+        recent = np.sort(join_times[current_time - join_times <= self.raid_detection['raid_time_window']])
+        recent_joins_count = int(recent.size)
+        
+        # 가입 간격 분석 (2초 미만 간격은 집중 가입으로 판단)
+        intervals = np.diff(recent)
+        burst_joins = int((intervals < 2.0).sum())
+        median_interval = float(np.median(intervals)) if intervals.size else 0.0
+        
+        is_raid = (recent_joins_count >= self.raid_detection['raid_threshold'] or
+                   burst_joins >= self.raid_detection['raid_threshold'] // 2)
+        
+        return {
+            'is_raid': is_raid,
+            'recent_joins_count': recent_joins_count,
+            'burst_joins': burst_joins,
+            'median_interval': median_interval,
+            'time_window': self.raid_detection['raid_time_window'],
+            'risk_level': 'critical' if is_raid else 'low',
+            'recommended_action': 'LOCK_SERVER' if is_raid else 'MONITOR'
+        }
+    
     def detect_suspicious_username(self, username: str) -> Dict[str, Any]:
         """의심스러운 사용자명 탐지"""
         username_lower = username.lower()
@@ -712,6 +743,30 @@ class AdvancedThreatDetector:
             'recommended_action': 'DELETE_FILE' if risk_score >= 0.7 else 'SCAN_FURTHER'
         }
     
+    async def analyze_file_security(self, filename: str, url: str,
+                                    session: Optional[aiohttp.ClientSession] = None) -> Dict[str, Any]:
+        """첨부파일 보안 분석 (공유 HTTP 세션으로 다운로드)"""
+        session = session or self.http_session
+        file_data = b''
+        
+        if session is not None:
+            async with session.get(url) as response:
+                response.raise_for_status()
+                file_data = await response.read()
+        
+        result = await self.analyze_file_threat(file_data, filename)
+        
+        # 이미지 파일은 콘텐츠 분석 추가
+        result['image_threats'] = []
+        if file_data and filename.lower().endswith(('.png', '.jpg', '.jpeg', '.gif', '.webp')):
+            result['image_threats'].append(await self.analyze_image_content(file_data, filename))
+        
+        result['is_suspicious'] = bool(
+            result['threats_detected'] or
+            any(image['threats_detected'] for image in result['image_threats'])
+        )
+        return result
+    
     async def update_threat_intelligence(self):
         """위협 인텔리전스 업데이트"""
         try:
@@ -12,8 +12,26 @@ from dataclasses import dataclass, asdict
 import threading
 from enum import Enum
 
+# orjson 사용 가능 시 JSON 직렬화 가속
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+def _json_dumps(obj) -> str:
+    """JSON 직렬화 (한글 그대로 유지)"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, ensure_ascii=False)
+
+def _json_loads(data):
+    """JSON 역직렬화"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 class UserTier(Enum):
     """사용자 등급"""
     NEWCOMER = "신규"      # 0-30일
@@ -281,7 +299,7 @@ class AdvancedUserManager:
                     ):
                         # 날짜 문자열은 그대로 반환하거나 기본값 사용
                         return default
-                    return json.loads(data)
+                    return _json_loads(data)
                 except (json.JSONDecodeError, TypeError, ValueError):
                     # 조용히 기본값 반환 (로그 스팸 방지)
                     return default
@@ -415,11 +433,11 @@ class AdvancedUserManager:
                 profile.user_tier.value, profile.risk_level.value,
                 profile.is_verified, profile.is_premium, profile.is_bot,
                 profile.mute_count, profile.kick_count, profile.ban_count, profile.timeout_count,
-                json.dumps(asdict(profile.behavior_pattern), ensure_ascii=False),
-                json.dumps(profile.personality_analysis, ensure_ascii=False),
-                json.dumps(profile.communication_style, ensure_ascii=False),
-                json.dumps(profile.interests, ensure_ascii=False),
-                json.dumps(profile.special_permissions, ensure_ascii=False),
+                _json_dumps(asdict(profile.behavior_pattern)),
+                _json_dumps(profile.personality_analysis),
+                _json_dumps(profile.communication_style),
+                _json_dumps(profile.interests),
+                _json_dumps(profile.special_permissions),
                 datetime.now().isoformat()
             ))
             
@@ -692,7 +710,7 @@ class AdvancedUserManager:
                 ) VALUES (?, ?, ?, ?, ?)
             ''', (
                 user_id, guild_id, activity_type,
-                json.dumps(activity_data, ensure_ascii=False),
+                _json_dumps(activity_data),
                 channel_id
             ))
             
@@ -1,15 +1,25 @@
 import discord
 from discord.ext import commands, tasks
 import asyncio
+import aiohttp
 import logging
-import json
 import time
 import re
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Final
+from functools import lru_cache
 import sys
 import os
-from collections import defaultdict, deque
+from collections import defaultdict, deque, namedtuple
+import psutil
+import numpy as np
+
+# uvloop 사용 가능 시 이벤트 루프 교체 (Windows 미지원)
+try:
+    import uvloop
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+except ImportError:
+    pass
 
 # 커스텀 모듈 임포트
 from core_ai_system import initialize_ai_judge, get_ai_judge
@@ -20,22 +30,27 @@ from advanced_security_system import advanced_threat_detector
 # 설정 - 환경변수에서 로드
 from dotenv import load_dotenv
 
-# .env 파일 로드
-load_dotenv()
-
-# 환경변수에서 토큰 가져오기
+# 환경변수에서 토큰 가져오기 (.env는 실행 시 load_config()에서 로드)
 DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
-if not DISCORD_TOKEN:
-    print("❌ DISCORD_TOKEN 환경변수가 설정되지 않았습니다!")
-    print("💡 .env 파일에 DISCORD_TOKEN=your_token_here 를 추가하세요")
-    exit(1)
-
-if not GEMINI_API_KEY:
-    print("❌ GEMINI_API_KEY 환경변수가 설정되지 않았습니다!")
-    print("💡 .env 파일에 GEMINI_API_KEY=your_api_key_here 를 추가하세요")
-    exit(1)
+def load_config():
+    """.env 파일 로드 및 필수 환경변수 확인"""
+    global DISCORD_TOKEN, GEMINI_API_KEY
+    
+    load_dotenv()
+    DISCORD_TOKEN = os.getenv('DISCORD_TOKEN')
+    GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
+    
+    if not DISCORD_TOKEN:
+        print("❌ DISCORD_TOKEN 환경변수가 설정되지 않았습니다!")
+        print("💡 .env 파일에 DISCORD_TOKEN=your_token_here 를 추가하세요")
+        exit(1)
+    
+    if not GEMINI_API_KEY:
+        print("❌ GEMINI_API_KEY 환경변수가 설정되지 않았습니다!")
+        print("💡 .env 파일에 GEMINI_API_KEY=your_api_key_here 를 추가하세요")
+        exit(1)
 
 # 로깅 설정 (서버 환경 최적화)
 logging.basicConfig(
@@ -47,6 +62,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 로그 레벨별 출력 함수
+_LOG_LEVEL_MAP: Final = {
+    "INFO": logger.info,
+    "SUCCESS": logger.info,
+    "WARNING": logger.warning,
+    "ERROR": logger.error,
+    "VIOLATION": logger.warning,
+    "ACTION": logger.info,
+    "COMMAND": logger.info
+}
+
+# AI 판사에 전달하는 서버 컨텍스트 (읽기 전용으로 취급)
+_GUILD_CONTEXT: Final = {
+    'strictness': '높음',
+    'recent_violations': '보통',
+    'server_type': '보안중시',
+    'special_notes': '자동처벌활성화'
+}
+
+@lru_cache(maxsize=4096)
+def _should_analyze_cached(content: str) -> bool:
+    """AI 분석 트리거 여부 (반복되는 짧은 메시지용 캐시)"""
+    return bool(_AI_TRIGGER_RE.search(content))
+
+# 메시지 버퍼 레코드 (dict 대신 튜플로 저장해 메모리 절약)
+MessageRecord = namedtuple('MessageRecord', 'content_hash author channel guild timestamp is_dm')
+
+# 부하 상황에서 분석 여부를 빠르게 판단하기 위한 URL 패턴
+_URL_RE = re.compile(r'https?://', re.IGNORECASE)
+
+# AI 분석이 필요한 키워드 패턴
+_AI_TRIGGER_RE = re.compile(
+    '|'.join([
+        '명령', '지시', '시스템', '관리자', '권한',
+        '토큰', '비밀번호', '로그인', '계정',
+        '돈', '투자', '수익', '무료', '이벤트'
+    ]),
+    re.IGNORECASE
+)
+
 class AdvancedSecurityBot:
     """AI 기반 Discord 보안봇 (서버 환경 최적화)"""
     
@@ -68,6 +123,7 @@ class AdvancedSecurityBot:
         self.ai_judge = None
         self.user_manager = advanced_user_manager
         self.natural_language_system = None
+        self.http_session = None
         
         # 메시지 분석을 위한 버퍼
         self.message_buffer = deque(maxlen=1000)
@@ -83,11 +139,15 @@ class AdvancedSecurityBot:
         
         # 레이드 탐지 시스템
         self.raid_detection = {
-            'recent_joins': deque(maxlen=50),
             'join_threshold': 5,  # 1분 내 5명 이상
             'time_window': 60  # 1분
         }
         
+        # 가입 시각 링 버퍼 (NumPy 벡터 연산용)
+        self._join_ring = np.zeros(256, dtype=np.float64)
+        self._join_head = 0
+        self._join_count = 0
+        
         # 스팸 탐지 기록
         self.spam_tracking = defaultdict(lambda: {
             'message_times': deque(maxlen=20),
@@ -98,6 +158,21 @@ class AdvancedSecurityBot:
         # 자동 역할 관리
         self.auto_roles = {}
         
+        # 자주 쓰는 임베드 템플릿 (Embed.from_dict용 사전 구성)
+        self._block_embed_dict = {
+            "title": "🚫 위험한 파일 차단",
+            "color": 0xFF0000,
+            "fields": [{"name": "탐지된 위협", "value": "", "inline": False}]
+        }
+        
+        # 위협 분석 태스크 동시 실행 제한
+        self._analysis_sem = asyncio.Semaphore(32)
+        self._bg_tasks: set = set()
+        
+        # 가동시간 및 프로세스 정보
+        self._start_time = time.time()
+        self._proc = psutil.Process()
+        
         # 이벤트 및 명령어 설정
         self.setup_bot_events()
         self.setup_bot_commands()
@@ -112,6 +187,14 @@ class AdvancedSecurityBot:
             self.ai_judge = get_ai_judge()
             logger.info("✅ AI 판사 시스템 초기화 완료")
             
+            # 공유 HTTP 세션 생성 (첨부파일 분석 시 연결 재사용)
+            if self.http_session is None or self.http_session.closed:
+                self.http_session = aiohttp.ClientSession(
+                    connector=aiohttp.TCPConnector(limit=32, limit_per_host=8, ttl_dns_cache=300, keepalive_timeout=30),
+                    timeout=aiohttp.ClientTimeout(total=15)
+                )
+                advanced_threat_detector.http_session = self.http_session
+            
             # 자연어 처리 시스템 초기화
             initialize_natural_language_system(GEMINI_API_KEY, self, advanced_user_manager, self.ai_judge)
             self.natural_language_system = get_natural_language_system()
@@ -128,18 +211,7 @@ class AdvancedSecurityBot:
     
     def log_message(self, level: str, message: str):
         """로그 출력 (서버 환경 최적화)"""
-        level_map = {
-            "INFO": logger.info,
-            "SUCCESS": logger.info,
-            "WARNING": logger.warning,
-            "ERROR": logger.error,
-            "VIOLATION": logger.warning,
-            "ACTION": logger.info,
-            "COMMAND": logger.info
-        }
-        
-        log_func = level_map.get(level, logger.info)
-        log_func(f"{level}: {message}")
+        _LOG_LEVEL_MAP.get(level, logger.info)(f"{level}: {message}")
     
     async def safe_delete_message(self, message):
         """안전하게 메시지 삭제"""
@@ -187,14 +259,14 @@ class AdvancedSecurityBot:
                 self.performance_stats['messages_processed'] += 1
                 
                 # 메시지 버퍼에 추가 (DM 안전 처리)
-                self.message_buffer.append({
-                    'content': message.content[:500],  # 메모리 절약
-                    'author': message.author.id,
-                    'channel': message.channel.id,
-                    'guild': message.guild.id if message.guild else 0,  # DM은 0으로 처리
-                    'timestamp': message.created_at,
-                    'is_dm': message.guild is None
-                })
+                self.message_buffer.append(MessageRecord(
+                    hash(message.content),  # 메모리 절약 (분석용 해시만 저장)
+                    message.author.id,
+                    message.channel.id,
+                    message.guild.id if message.guild else 0,  # DM은 0으로 처리
+                    time.time(),
+                    message.guild is None
+                ))
                 
                 # DM 메시지 처리 (안전)
                 if message.guild is None:
@@ -221,22 +293,20 @@ class AdvancedSecurityBot:
                                     image_analysis = file_analysis['image_threats'][0]  # 첫 번째 이미지 분석 결과
                                     if image_analysis['threats_detected']:
                                         file_analysis['threats_detected'].extend(image_analysis['threats_detected'])
-                                elif image_analysis['threats_detected']:
-                                    file_analysis['threats_detected'].extend(image_analysis['threats_detected'])
                             
                             if file_analysis['should_block']:
                                 await self.safe_delete_message(message)
-                                embed = discord.Embed(
-                                    title="🚫 위험한 파일 차단",
-                                    description=f"업로드된 파일 `{attachment.filename}`이 보안 위협으로 판정되어 차단되었습니다.",
-                                    color=0xFF0000
-                                )
-                                embed.add_field(
-                                    name="탐지된 위협",
-                                    value="\n".join([threat['reason'] for threat in file_analysis['threats_detected']])[:1000],
-                                    inline=False
-                                )
-                                await message.channel.send(embed=embed, delete_after=10)
+                                # 템플릿 복사본 사용 (동시 실행 핸들러 간 공유 방지)
+                                template = self._block_embed_dict
+                                embed_dict = {
+                                    **template,
+                                    "description": f"업로드된 파일 `{attachment.filename}`이 보안 위협으로 판정되어 차단되었습니다.",
+                                    "fields": [{
+                                        **template["fields"][0],
+                                        "value": "\n".join([threat['reason'] for threat in file_analysis['threats_detected']])[:1000]
+                                    }]
+                                }
+                                await message.channel.send(embed=discord.Embed.from_dict(embed_dict), delete_after=10)
                                 self.log_message("WARNING", f"위험한 파일 차단: {attachment.filename} by {message.author.name}")
                         except Exception as file_error:
                             logger.error(f"파일 보안 검사 오류: {file_error}")
@@ -245,8 +315,13 @@ class AdvancedSecurityBot:
                 if await self.detect_spam(message):
                     return
                 
-                # 인텔리전트 위협 분석 및 처벌
-                asyncio.create_task(self.intelligent_threat_analysis_and_punishment(message))
+                # 인텔리전트 위협 분석 및 처벌 (과부하 시 저위험 메시지는 건너뜀)
+                if self._analysis_sem.locked() and not self._is_high_priority_message(message):
+                    return
+                
+                task = asyncio.create_task(self._analyze_guarded(message))
+                self._bg_tasks.add(task)
+                task.add_done_callback(self._bg_tasks.discard)
                 
             except Exception as e:
                 logger.error(f"메시지 처리 오류: {e}")
@@ -254,19 +329,18 @@ class AdvancedSecurityBot:
         @self.bot.event
         async def on_member_join(member):
             """새 멤버 합류 시"""
+            self._invalidate_member_index(member.guild.id)
             try:
                 # 레이드 탐지
                 current_time = time.time()
-                self.raid_detection['recent_joins'].append(current_time)
+                self._record_join(current_time)
+                recent_joins = self._recent_joins()
                 
                 # 1분 내 가입자 수 체크
-                recent_count = sum(1 for join_time in self.raid_detection['recent_joins'] 
-                                 if current_time - join_time <= self.raid_detection['time_window'])
+                recent_count = int((current_time - recent_joins <= self.raid_detection['time_window']).sum())
                 
                 if recent_count >= self.raid_detection['join_threshold']:
-                    raid_result = await advanced_threat_detector.analyze_raid_pattern(
-                        list(self.raid_detection['recent_joins'])
-                    )
+                    raid_result = await advanced_threat_detector.analyze_raid_pattern(recent_joins)
                     if raid_result['is_raid']:
                         self.log_message("WARNING", f"레이드 공격 탐지: {raid_result['recent_joins_count']}명 빠른 가입")
                     
@@ -296,8 +370,43 @@ class AdvancedSecurityBot:
         @self.bot.event
         async def on_member_remove(member):
             """멤버 퇴장 시"""
+            self._invalidate_member_index(member.guild.id)
             self.log_message("INFO", f"멤버 퇴장: {member.name} ({member.id})")
+        
+        @self.bot.event
+        async def on_member_update(before, after):
+            """멤버 정보 변경 시 (서버 닉네임 변경)"""
+            if before.display_name != after.display_name:
+                self._invalidate_member_index(after.guild.id)
+        
+        @self.bot.event
+        async def on_user_update(before, after):
+            """사용자 정보 변경 시 (사용자명/전역 표시 이름 변경)"""
+            if before.name != after.name or before.global_name != after.global_name:
+                for guild in after.mutual_guilds:
+                    self._invalidate_member_index(guild.id)
+    
+    def _invalidate_member_index(self, guild_id: int):
+        """자연어 명령 실행기의 멤버 이름 색인 무효화"""
+        if self.natural_language_system:
+            _, executor = self.natural_language_system
+            if executor:
+                executor.invalidate_member_index(guild_id)
     
+    def _record_join(self, join_time: float):
+        """가입 시각을 링 버퍼에 기록"""
+        capacity = self._join_ring.shape[0]
+        self._join_ring[self._join_head] = join_time
+        self._join_head = (self._join_head + 1) % capacity
+        self._join_count = min(capacity, self._join_count + 1)
+
+    def _recent_joins(self) -> np.ndarray:
+        """링 버퍼의 가입 시각을 오래된 순으로 반환"""
+        return np.concatenate((
+            self._join_ring[self._join_head:self._join_count],
+            self._join_ring[:self._join_head]
+        ))
+
     def setup_bot_commands(self):
         """봇 명령어 설정"""
         
@@ -305,7 +414,7 @@ class AdvancedSecurityBot:
         async def status_command(ctx):
             """봇 상태 확인"""
             try:
-                uptime = time.time() - getattr(self, '_start_time', time.time())
+                uptime = time.time() - self._start_time
                 uptime_str = str(timedelta(seconds=int(uptime)))
                 
                 embed = discord.Embed(
@@ -340,7 +449,8 @@ class AdvancedSecurityBot:
             # 사용자별 메시지 기록 업데이트
             user_tracking = self.spam_tracking[user_id]
             user_tracking['message_times'].append(current_time)
-            user_tracking['message_contents'].append(message.content[:100])
+            content = message.content
+            user_tracking['message_contents'].append(hash(content if len(content) <= 100 else content[:100]))
             
             # 스팸 탐지 로직
             recent_messages = [t for t in user_tracking['message_times'] if current_time - t <= 30]
@@ -365,22 +475,42 @@ class AdvancedSecurityBot:
             user = message.author
             content = message.content
             
-            # 1단계: 고급 보안 스캔
-            security_result = await advanced_threat_detector.analyze_message_security(
-                content, user.id, message.channel.id
+            # 프로필 생성/활동 시각 갱신은 사전 필터와 무관하게 매 메시지마다 수행 (메모리 조회)
+            profile = await self.user_manager.get_or_create_user_profile(
+                user.id, user.name, message.guild.id
             )
             
+            # 0단계: 로컬 사전 필터 (명백히 안전한 메시지는 무거운 분석 생략)
+            if len(content) < 5 and not message.attachments:
+                return
+            
+            if (profile.user_tier == UserTier.TRUSTED
+                    and not _URL_RE.search(content)
+                    and not _AI_TRIGGER_RE.search(content)):
+                return
+            
+            # 사용자 컨텍스트는 보안 스캔과 동시에 미리 조회
+            user_ctx_task = None
+            if self.ai_judge:
+                user_ctx_task = asyncio.create_task(self.user_manager.get_user_context(user.id))
+            
+            try:
+                # 1단계: 고급 보안 스캔
+                security_result = await advanced_threat_detector.analyze_message_security(
+                    content, user.id, message.channel.id
+                )
+            except Exception:
+                if user_ctx_task:
+                    user_ctx_task.cancel()
+                raise
+            
             # 2단계: AI 판사 분석 (필요시)
             ai_judgment = None
-            if self.ai_judge and (security_result['threats_detected'] or self._should_analyze_message(message)):
-                user_context = await self.user_manager.get_user_context(user.id)
-                guild_context = {
-                    'strictness': '높음',
-                    'recent_violations': '보통',
-                    'server_type': '보안중시',
-                    'special_notes': '자동처벌활성화'
-                }
-                ai_judgment = await self.ai_judge.comprehensive_judgment(content, user_context, guild_context)
+            if user_ctx_task and (security_result['threats_detected'] or self._should_analyze_message(message)):
+                user_context = await user_ctx_task
+                ai_judgment = await self.ai_judge.comprehensive_judgment(content, user_context, _GUILD_CONTEXT)
+            elif user_ctx_task:
+                user_ctx_task.cancel()
             
             # 3단계: 통합 판단 및 처벌 결정
             final_decision = await self._make_final_punishment_decision(
@@ -394,18 +524,31 @@ class AdvancedSecurityBot:
         except Exception as e:
             logger.error(f"통합 위협 분석 오류: {e}")
 
+    async def _analyze_guarded(self, message):
+        """동시 실행 수를 제한한 위협 분석"""
+        async with self._analysis_sem:
+            await self.intelligent_threat_analysis_and_punishment(message)
+
+    def _is_high_priority_message(self, message):
+        """과부하 시에도 반드시 분석해야 하는 메시지인지 판단"""
+        return bool(
+            message.attachments
+            or _URL_RE.search(message.content)
+            or self._should_analyze_message(message)
+        )
+
+    def _cancel_bg_tasks(self):
+        """진행 중인 분석 태스크 취소"""
+        for task in list(self._bg_tasks):
+            task.cancel()
+        self._bg_tasks.clear()
+
     def _should_analyze_message(self, message):
         """메시지가 AI 분석이 필요한지 판단"""
-        content = message.content.lower()
-        
-        # AI 분석이 필요한 패턴들
-        ai_analysis_triggers = [
-            '명령', '지시', '시스템', '관리자', '권한',
-            '토큰', '비밀번호', '로그인', '계정',
-            '돈', '투자', '수익', '무료', '이벤트'
-        ]
-        
-        return any(trigger in content for trigger in ai_analysis_triggers)
+        content = message.content
+        if len(content) > 200:  # 긴 메시지는 캐시 메모리 절약을 위해 직접 검사
+            return bool(_AI_TRIGGER_RE.search(content))
+        return _should_analyze_cached(content)
 
     async def _make_final_punishment_decision(self, message, security_result, ai_judgment):
         """보안 스캔과 AI 판단을 종합해서 최종 처벌 결정"""
@@ -531,10 +674,10 @@ class AdvancedSecurityBot:
         """주기적 정리 작업"""
         try:
             # 오래된 메시지 버퍼 정리
-            current_time = datetime.now()
+            current_time = time.time()
             self.message_buffer = deque([
                 msg for msg in self.message_buffer
-                if (current_time - msg['timestamp']).total_seconds() < 3600  # 1시간
+                if current_time - msg.timestamp < 3600  # 1시간
             ], maxlen=1000)
             
             # 스팸 추적 정리
@@ -571,10 +714,8 @@ class AdvancedSecurityBot:
     async def performance_monitor(self):
         """성능 모니터링"""
         try:
-            # 메모리 사용량 체크
-            import psutil
-            process = psutil.Process()
-            memory_mb = process.memory_info().rss / 1024 / 1024
+            # 메모리 사용량 체크 (이벤트 루프 블로킹 방지)
+            memory_mb = (await asyncio.to_thread(self._proc.memory_info)).rss / 1024 / 1024
             
             if memory_mb > 500:  # 500MB 초과시 경고
                 logger.warning(f"높은 메모리 사용량: {memory_mb:.1f}MB")
@@ -594,20 +735,26 @@ class AdvancedSecurityBot:
         retry_count = 0
         max_retries = 3
         
-        while retry_count < max_retries:
-            retry_count += 1
-            try:
-                await self.bot.start(DISCORD_TOKEN)
-                break
-            except Exception as e:
-                logger.error(f"봇 시작 오류 (시도 {retry_count}/{max_retries}): {e}")
-                
-                if retry_count < max_retries:
-                    await asyncio.sleep(5 * retry_count)  # 점진적 대기
-                    logger.info(f"{5 * retry_count}초 후 재시도...")
-                else:
-                    logger.error("모든 재시도 실패 - 봇 시작 중단")
-                    raise
+        try:
+            while retry_count < max_retries:
+                retry_count += 1
+                try:
+                    await self.bot.start(DISCORD_TOKEN)
+                    break
+                except Exception as e:
+                    logger.error(f"봇 시작 오류 (시도 {retry_count}/{max_retries}): {e}")
+                    
+                    if retry_count < max_retries:
+                        await asyncio.sleep(5 * retry_count)  # 점진적 대기
+                        logger.info(f"{5 * retry_count}초 후 재시도...")
+                    else:
+                        logger.error("모든 재시도 실패 - 봇 시작 중단")
+                        raise
+        finally:
+            # 종료 시 남은 분석 태스크 및 HTTP 세션 정리
+            self._cancel_bg_tasks()
+            if self.http_session and not self.http_session.closed:
+                await self.http_session.close()
 
 async def main():
     """서버용 메인 함수"""
@@ -624,4 +771,5 @@ async def main():
         logger.error(f"봇 실행 오류: {e}")
 
 if __name__ == "__main__":
+    load_config()
     asyncio.run(main())
\ No newline at end of file
@@ -25,7 +25,10 @@ def check_gemini_setup():
     print()
     
     try:
-        import google.generativeai as genai
+        # 설치 여부만 확인 (무거운 라이브러리 임포트 생략)
+        import importlib.util
+        if importlib.util.find_spec('google.generativeai') is None:
+            raise ImportError('google.generativeai')
         print("✅ Gemini 라이브러리 설치됨")
         
         # API 키 확인 (환경변수에서 직접)
@@ -2,16 +2,127 @@ import asyncio
 import re
 import json
 import logging
+import hashlib
+import heapq
+import time
+from collections import Counter, OrderedDict, defaultdict, deque
+from itertools import islice
 from typing import Dict, List, Optional, Any, Tuple, Union
-from datetime import datetime, timedelta
+from datetime import timedelta
 import google.generativeai as genai
+from google.api_core import exceptions as google_exceptions
 from dataclasses import dataclass
 from enum import Enum
+import numpy as np
 import discord
 from discord.ext import commands
 
+# orjson 사용 가능 시 JSON 파싱 가속
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# 현재 시각(시) 캐시 [epoch 분, 시] - 분 단위로만 갱신
+_HOUR_CACHE = [-1, 0]
+
+def _current_hour() -> int:
+    """현재 로컬 시각의 시 (분 단위 캐시)"""
+    now = time.time()
+    minute = int(now // 60)
+    if _HOUR_CACHE[0] != minute:
+        _HOUR_CACHE[0] = minute
+        _HOUR_CACHE[1] = time.localtime(now).tm_hour
+    return _HOUR_CACHE[1]
+
+def _json_loads(data):
+    """JSON 역직렬화"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+# 매개변수 추출용 정규식 (모듈 로드 시 1회 컴파일)
+_NUM_RE = re.compile(r'\d+')
+_MENTION_RE = re.compile(r'<@!?(\d+)>')
+_USER_RE = re.compile(r'(?:사용자|유저)\s*([가-힣a-zA-Z0-9_]+)')
+_CHAN_RE = re.compile(r'<#(\d+)>')
+
+# 시간 키워드 -> 기간 (정의 순서가 우선순위)
+_TIME_DELTAS = {
+    '어제': timedelta(days=1),
+    '일주일': timedelta(weeks=1),
+    '한달': timedelta(days=30),
+    '오늘': timedelta(days=0),
+    '최근': timedelta(days=7)
+}
+# 본문 위치와 무관하게 앞선 키워드가 우선하도록 전방탐색 대안으로 구성
+_TIME_KW_RE = re.compile(
+    r'\A(?:' + '|'.join(f'(?=(?s:.*?)({re.escape(kw)}))' for kw in _TIME_DELTAS) + ')'
+)
+
+# 컨텍스트/매개변수 분석용 키워드 집합
+_ADMIN_ACTION_KEYWORDS = frozenset({'차단', '뮤트', '삭제'})
+_URGENT_KEYWORDS = frozenset({'긴급', '즉시', '빨리'})
+_ENABLE_KEYWORDS = frozenset({'활성화', '켜'})
+_DISABLE_KEYWORDS = frozenset({'비활성화', '꺼'})
+
+# 모든 키워드를 한 번의 스캔으로 찾는 정규식 (전방 탐색으로 겹치는 키워드도 탐지)
+_KEYWORD_RE = re.compile('(?=(' + '|'.join(map(re.escape, sorted(
+    _ADMIN_ACTION_KEYWORDS | _URGENT_KEYWORDS | _ENABLE_KEYWORDS | _DISABLE_KEYWORDS | {'위험', '경고'},
+    key=len, reverse=True
+))) + '))')
+
+def _find_keywords(text: str) -> set:
+    """텍스트에 포함된 고정 키워드 집합 반환"""
+    return {match.group(1) for match in _KEYWORD_RE.finditer(text)}
+
+# 명령 파싱 프롬프트의 고정 부분 (Gemini 프리픽스 캐시 적중을 위해 가변 입력보다 앞에 배치)
+_COMMAND_PARSE_PROMPT_PREFIX = """
+당신은 디스코드 보안봇의 자연어 명령 해석 AI입니다.
+아래 사용자 명령을 분석하고 구조화된 정보를 추출해주세요.
+
+다음 카테고리 중 하나로 분류하세요:
+1. SECURITY (보안 관련)
+2. USER_MANAGEMENT (사용자 관리)
+3. MONITORING (모니터링)
+4. SETTINGS (설정 변경)
+5. STATISTICS (통계 조회)
+6. MODERATION (관리 작업)
+7. AI_CONTROL (AI 제어)
+8. SYSTEM (시스템 작업)
+
+다음 의도 중 하나로 분류하세요:
+1. QUERY (조회/확인)
+2. ACTION (실행/수행)
+3. MODIFY (수정/변경)
+4. DELETE (삭제)
+5. CREATE (생성)
+6. ANALYZE (분석)
+
+추가로 다음을 추출하세요:
+- 대상 (사용자명, ID, 채널 등)
+- 매개변수 (숫자, 시간, 옵션 등)
+- 제안할 구체적 행동
+
+예시 명령들:
+- "홍길동 사용자 정보 보여줘" → USER_MANAGEMENT, QUERY, target: 홍길동
+- "신뢰도 낮은 사용자들 차단해" → SECURITY, ACTION, parameters: {trust_threshold: "low"}
+- "어제부터 위반 통계 분석해줘" → STATISTICS, ANALYZE, parameters: {timeframe: "yesterday"}
+
+반드시 다음 JSON 형식으로 응답하세요:
+{
+    "category": "카테고리명",
+    "intent": "의도명",
+    "confidence": 0.0-1.0,
+    "target": "대상 또는 null",
+    "parameters": {"키": "값"},
+    "suggested_action": "구체적인 수행 작업",
+    "reasoning": "판단 근거"
+}
+"""
+
 class CommandCategory(Enum):
     """명령어 카테고리"""
     SECURITY = "보안"
@@ -47,27 +158,79 @@ class ParsedCommand:
         if self.parameters is None:
             self.parameters = {}
 
+# 의미 유사도 캐시를 허용하는 읽기 전용 의도
+# (차단/해제처럼 문장이 비슷해도 결과가 정반대인 실행 명령은 정확 일치 캐시만 사용)
+_SEMANTIC_CACHE_INTENTS = frozenset({CommandIntent.QUERY, CommandIntent.ANALYZE})
+
+# Gemini 모델 객체 풀 (모델 이름 -> GenerativeModel, 파서 간 공유)
+_MODEL_CACHE: Dict[str, genai.GenerativeModel] = {}
+_configured_api_key: Optional[str] = None
+
+# JSON 전용 응답 설정 (응답 파싱 안정화)
+_GENERATION_CONFIG = genai.GenerationConfig(
+    response_mime_type="application/json",
+    temperature=0.2
+)
+
+def _configure_genai(api_key: str):
+    """Gemini API 키 설정 (키가 바뀐 경우에만 재설정)"""
+    global _configured_api_key
+    if _configured_api_key != api_key:
+        genai.configure(api_key=api_key)
+        _configured_api_key = api_key
+        _MODEL_CACHE.clear()
+
+def _get_model(model_name: str) -> genai.GenerativeModel:
+    """공유 Gemini 모델 반환 (없으면 생성)"""
+    model = _MODEL_CACHE.get(model_name)
+    if model is None:
+        model = genai.GenerativeModel(model_name, generation_config=_GENERATION_CONFIG)
+        _MODEL_CACHE[model_name] = model
+    return model
+
 class NaturalLanguageCommandParser:
     """자연어 명령어 파서"""
     
     def __init__(self, gemini_api_key: str):
-        genai.configure(api_key=gemini_api_key)
+        _configure_genai(gemini_api_key)
+        
         # 최신 Gemini 모델 사용 (향상된 자연어 처리)
         try:
-            self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+            self.model = _get_model('gemini-2.0-flash-exp')
             logger.info("✅ 자연어 처리용 Gemini 2.0 Flash 모델 초기화 완료")
         except Exception as e:
-            self.model = genai.GenerativeModel('gemini-1.5-pro-latest')
+            self.model = _get_model('gemini-1.5-pro-latest')
             logger.info("✅ 자연어 처리용 Gemini 1.5 Pro Latest 모델로 폴백 초기화")
         
         # 명령어 패턴 데이터베이스
         self.command_patterns = self._initialize_command_patterns()
+        self._combined_pattern, self._group_meta = self._build_combined_pattern()
+        self._example_cache = self._build_example_cache()
         
         # 컨텍스트 메모리
         self.conversation_context = {}
         
-        # 명령 히스토리
-        self.command_history = []
+        # 명령 히스토리 (최대 100개 유지)
+        self.command_history = deque(maxlen=100)
+        
+        # Gemini 동시 호출 제한 (할당량 초과 방지)
+        self._gemini_sem = asyncio.Semaphore(8)
+        self._gemini_max_retries = 3
+        
+        # AI 파싱 결과 캐시 (정확 일치 LRU + 임베딩 기반 의미 유사도)
+        self._exact_cache: OrderedDict = OrderedDict()
+        self._exact_cache_max = 1024
+        self._semantic_cache: deque = deque(maxlen=256)  # (정규화된 임베딩, 결과)
+        self._semantic_threshold = 0.95
+        
+        # 패턴 매칭 신뢰도가 이 값 이상이고 대상이 명시되면 AI 파싱 생략
+        self.ai_fallback_threshold = 0.75
+        
+        # 연속 명령 통계 (이전 명령 캐시 키 -> 다음 명령 빈도), 예측 캐시 예열용
+        self._bigram: Dict[bytes, Counter] = defaultdict(Counter)
+        self._bigram_max = 1024
+        self._bigram_followups_max = 8
+        self._prewarm_tasks = set()
     
     def _initialize_command_patterns(self) -> Dict[str, List[Dict]]:
         """명령어 패턴 초기화"""
@@ -103,23 +266,57 @@ class NaturalLanguageCommandParser:
             ]
         }
     
-    async def parse_natural_command(self, text: str, user_context: Dict[str, Any] = None) -> ParsedCommand:
-        """자연어 명령 파싱"""
+    def _build_combined_pattern(self) -> Tuple[re.Pattern, Dict[str, Dict]]:
+        """모든 명령어 패턴을 하나의 정규식으로 결합
+        
+        각 패턴을 문자열 시작 위치의 전방 탐색으로 감싸서, 한 번의 검색으로
+        기존 순차 탐색과 동일하게 정의 순서상 첫 번째로 일치하는 패턴을 찾는다.
+        """
+        alternatives = []
+        group_meta = {}
+        
+        for category_patterns in self.command_patterns.values():
+            for pattern_data in category_patterns:
+                name = f"p{len(group_meta)}"
+                alternatives.append(f"\\A(?=(?s:.*?)(?P<{name}>{pattern_data['pattern']}))")
+                group_meta[name] = pattern_data
+        
+        return re.compile("|".join(alternatives), re.IGNORECASE), group_meta
+    
+    def _build_example_cache(self) -> List[Tuple[str, str]]:
+        """자동완성용 (예시 문장, 소문자 변환본) 목록 생성"""
+        examples = []
+        for category_patterns in self.command_patterns.values():
+            for pattern_data in category_patterns:
+                # 패턴을 자연어 예시로 변환 (간단화)
+                example = pattern_data["pattern"].replace(r".*", " ").replace(r"\.", "")
+                examples.append((example, example.lower()))
+        return examples
+    
+    async def parse_natural_command(self, text: str, user_context: Dict[str, Any] = None,
+                                    record_history: bool = True) -> ParsedCommand:
+        """자연어 명령 파싱 (record_history=False면 히스토리/연속 명령 통계/캐시 예열 생략)"""
         try:
             # 1. 기본 패턴 매칭
             basic_match = self._match_basic_patterns(text)
             
-            # 2. AI 기반 고급 파싱
-            ai_analysis = await self._ai_parse_command(text, user_context)
+            # 2. AI 기반 고급 파싱 (패턴만으로 충분하면 생략, 네트워크 대기 동안 로컬 분석 병행)
+            ai_task = None
+            if not self._basic_match_sufficient(text, basic_match):
+                ai_task = asyncio.create_task(self._ai_parse_command(text, user_context))
+                await asyncio.sleep(0)  # AI 요청이 먼저 시작되도록 양보
             
             # 3. 컨텍스트 기반 보정
             context_analysis = self._analyze_context(text, user_context)
             
+            ai_analysis = await ai_task if ai_task else {"confidence": 0.0}
+            
             # 4. 최종 명령 구성
             final_command = self._synthesize_command(text, basic_match, ai_analysis, context_analysis)
             
             # 5. 명령 히스토리에 추가
-            self._add_to_history(final_command)
+            if record_history:
+                self._add_to_history(final_command)
             
             return final_command
             
@@ -133,87 +330,155 @@ class NaturalLanguageCommandParser:
                 suggested_action="명령을 이해할 수 없습니다"
             )
     
+    async def parse_natural_command_batch(self, texts: List[str],
+                                         contexts: List[Dict[str, Any]] = None,
+                                         record_history: bool = False) -> List[ParsedCommand]:
+        """여러 자연어 명령 일괄 파싱 (실시간 응답이 필요 없는 작업용, 기본적으로 히스토리에 기록하지 않음)"""
+        if contexts is None:
+            contexts = [None] * len(texts)
+        elif len(contexts) != len(texts):
+            raise ValueError(f"texts와 contexts의 길이가 다릅니다: {len(texts)} != {len(contexts)}")
+        
+        # Gemini 호출은 _generate_content의 세마포어로 동시 실행 수가 제한됨
+        return list(await asyncio.gather(*(
+            self.parse_natural_command(text, context, record_history=record_history)
+            for text, context in zip(texts, contexts)
+        )))
+    
     def _match_basic_patterns(self, text: str) -> Dict[str, Any]:
         """기본 패턴 매칭"""
-        matches = []
-        
-        for category_name, patterns in self.command_patterns.items():
-            for pattern_data in patterns:
-                if re.search(pattern_data["pattern"], text, re.IGNORECASE):
-                    matches.append({
-                        "category": pattern_data["category"],
-                        "intent": pattern_data["intent"],
-                        "confidence": 0.8,
-                        "pattern": pattern_data["pattern"]
-                    })
-        
-        if matches:
-            # 가장 높은 신뢰도의 매치 반환
-            return max(matches, key=lambda x: x["confidence"])
+        match = self._combined_pattern.search(text)
+        
+        if match:
+            pattern_data = self._group_meta[match.lastgroup]
+            return {
+                "category": pattern_data["category"],
+                "intent": pattern_data["intent"],
+                "confidence": 0.8,
+                "pattern": pattern_data["pattern"]
+            }
         
         return {"confidence": 0.0}
     
+    def _basic_match_sufficient(self, text: str, basic_match: Dict[str, Any]) -> bool:
+        """패턴 매칭 결과만으로 명령을 확정할 수 있는지 (AI 호출 생략 여부)"""
+        if basic_match.get("confidence", 0) < self.ai_fallback_threshold:
+            return False
+        
+        # 대상 사용자가 명시된 경우에만 확정 (나머지는 AI로 대상 추론)
+        params = self._extract_parameters(text, basic_match["category"], basic_match["intent"])
+        return bool(params.get('mentioned_users') or params.get('usernames'))
+    
+    @staticmethod
+    def _normalize_text(text: str) -> str:
+        """캐시/통계용 명령 텍스트 정규화"""
+        return text.strip().lower()
+    
+    @classmethod
+    def _cache_key(cls, text: str) -> bytes:
+        """정규화된 명령 텍스트의 캐시 키"""
+        return hashlib.blake2b(cls._normalize_text(text).encode(), digest_size=16).digest()
+    
+    @staticmethod
+    def _copy_parse_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """캐시된 결과 복사 (호출자가 parameters를 수정하므로)"""
+        return {**result, "parameters": dict(result.get("parameters") or {})}
+    
+    async def _embed_text(self, text: str) -> Optional[np.ndarray]:
+        """의미 캐시용 텍스트 임베딩 (실패 시 None)"""
+        try:
+            response = await asyncio.to_thread(
+                genai.embed_content, model="models/text-embedding-004", content=text.strip()
+            )
+            vector = np.asarray(response["embedding"], dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm else None
+        except Exception as e:
+            logger.debug(f"임베딩 생성 실패: {e}")
+            return None
+    
+    def _semantic_lookup(self, embedding: np.ndarray) -> Optional[Dict[str, Any]]:
+        """가장 유사한 캐시 항목이 임계값 이상이면 반환"""
+        if embedding is None or not self._semantic_cache:
+            return None
+        
+        matrix = np.stack([cached_embedding for cached_embedding, _ in self._semantic_cache])
+        similarities = matrix @ embedding
+        best = int(np.argmax(similarities))
+        if similarities[best] < self._semantic_threshold:
+            return None
+        
+        cached = self._semantic_cache[best][1]
+        if cached.get("intent") not in _SEMANTIC_CACHE_INTENTS:
+            return None
+        
+        # 유사 문장은 대상이 다를 수 있으므로 target은 재사용하지 않음
+        result = self._copy_parse_result(cached)
+        result["target"] = None
+        return result
+    
+    def _store_parse_result(self, key: bytes, embedding: Optional[np.ndarray], result: Dict[str, Any]):
+        """성공한 파싱 결과를 캐시에 저장"""
+        self._exact_cache[key] = self._copy_parse_result(result)
+        self._exact_cache.move_to_end(key)
+        if len(self._exact_cache) > self._exact_cache_max:
+            self._exact_cache.popitem(last=False)
+        
+        if embedding is not None and result.get("intent") in _SEMANTIC_CACHE_INTENTS:
+            self._semantic_cache.append((embedding, self._copy_parse_result(result)))
+    
+    def _build_prompt(self, text: str, user_context: Dict[str, Any]) -> str:
+        """명령 파싱 프롬프트 생성 (고정 프리픽스 + 가변 입력)"""
+        user_context = user_context or {}
+        return _COMMAND_PARSE_PROMPT_PREFIX + f"""
+사용자 컨텍스트:
+- 권한 레벨: {user_context.get('permission_level', '일반')}
+- 이전 명령들: {user_context.get('recent_commands', [])}
+- 현재 채널: {user_context.get('channel_type', '일반')}
+
+사용자 명령: "{text}"
+"""
+    
+    async def _generate_content(self, prompt: str):
+        """동시 호출 수를 제한한 Gemini 호출 (할당량 초과 시 지수 백오프)"""
+        delay = 1.0
+        for attempt in range(self._gemini_max_retries):
+            try:
+                async with self._gemini_sem:
+                    return await self.model.generate_content_async(prompt)
+            except google_exceptions.ResourceExhausted as e:
+                if attempt == self._gemini_max_retries - 1:
+                    raise
+                logger.warning(f"Gemini 할당량 초과 (시도 {attempt + 1}/{self._gemini_max_retries}): {e}")
+                await asyncio.sleep(delay)
+                delay *= 2
+    
     async def _ai_parse_command(self, text: str, user_context: Dict[str, Any]) -> Dict[str, Any]:
         """AI 기반 명령 파싱"""
+        # 1차: 정확 일치 캐시
+        key = self._cache_key(text)
+        cached = self._exact_cache.get(key)
+        if cached is not None:
+            self._exact_cache.move_to_end(key)
+            return self._copy_parse_result(cached)
+        
+        # 2차: 의미 유사도 캐시
+        embedding = await self._embed_text(text)
+        cached = self._semantic_lookup(embedding)
+        if cached is not None:
+            return cached
+        
         try:
-            prompt = f"""
-            당신은 디스코드 보안봇의 자연어 명령 해석 AI입니다.
-            다음 자연어 명령을 분석하고 구조화된 정보를 추출해주세요.
-
-            사용자 명령: "{text}"
-            
-            사용자 컨텍스트:
-            - 권한 레벨: {user_context.get('permission_level', '일반')}
-            - 이전 명령들: {user_context.get('recent_commands', [])}
-            - 현재 채널: {user_context.get('channel_type', '일반')}
-
-            다음 카테고리 중 하나로 분류하세요:
-            1. SECURITY (보안 관련)
-            2. USER_MANAGEMENT (사용자 관리)
-            3. MONITORING (모니터링)
-            4. SETTINGS (설정 변경)
-            5. STATISTICS (통계 조회)
-            6. MODERATION (관리 작업)
-            7. AI_CONTROL (AI 제어)
-            8. SYSTEM (시스템 작업)
-
-            다음 의도 중 하나로 분류하세요:
-            1. QUERY (조회/확인)
-            2. ACTION (실행/수행)
-            3. MODIFY (수정/변경)
-            4. DELETE (삭제)
-            5. CREATE (생성)
-            6. ANALYZE (분석)
-
-            추가로 다음을 추출하세요:
-            - 대상 (사용자명, ID, 채널 등)
-            - 매개변수 (숫자, 시간, 옵션 등)
-            - 제안할 구체적 행동
-
-            예시 명령들:
-            - "홍길동 사용자 정보 보여줘" → USER_MANAGEMENT, QUERY, target: 홍길동
-            - "신뢰도 낮은 사용자들 차단해" → SECURITY, ACTION, parameters: {{trust_threshold: "low"}}
-            - "어제부터 위반 통계 분석해줘" → STATISTICS, ANALYZE, parameters: {{timeframe: "yesterday"}}
-
-            반드시 다음 JSON 형식으로 응답하세요:
-            {{
-                "category": "카테고리명",
-                "intent": "의도명", 
-                "confidence": 0.0-1.0,
-                "target": "대상 또는 null",
-                "parameters": {{"키": "값"}},
-                "suggested_action": "구체적인 수행 작업",
-                "reasoning": "판단 근거"
-            }}
-            """
+            prompt = self._build_prompt(text, user_context)
             
-            response = self.model.generate_content(prompt)
-            ai_result = json.loads(response.text.strip())
+            response = await self._generate_content(prompt)
+            ai_result = _json_loads(response.text)
             
             # 카테고리와 의도를 Enum으로 변환
             try:
                 ai_result["category"] = CommandCategory[ai_result["category"]]
                 ai_result["intent"] = CommandIntent[ai_result["intent"]]
+                self._store_parse_result(key, embedding, ai_result)
             except KeyError as e:
                 logger.warning(f"AI 응답의 Enum 변환 실패: {e}")
                 ai_result["category"] = CommandCategory.SYSTEM
@@ -240,6 +505,8 @@ class NaturalLanguageCommandParser:
         elif permission_level == '모더레이터':
             context_score += 0.1
         
+        keywords = _find_keywords(text)
+        
         # 이전 명령과의 연관성 확인
         recent_commands = user_context.get('recent_commands', [])
         if recent_commands:
@@ -250,12 +517,12 @@ class NaturalLanguageCommandParser:
         
         # 채널 타입에 따른 명령 적합성
         channel_type = user_context.get('channel_type', '일반')
-        if channel_type == '관리자채널' and any(keyword in text for keyword in ['차단', '뮤트', '삭제']):
+        if channel_type == '관리자채널' and keywords & _ADMIN_ACTION_KEYWORDS:
             context_score += 0.1
         
         # 시간대별 명령 적합성 (예: 새벽에는 긴급 명령일 가능성)
-        current_hour = datetime.now().hour
-        if 0 <= current_hour <= 6 and any(urgent in text for urgent in ['긴급', '즉시', '빨리']):
+        current_hour = _current_hour()
+        if 0 <= current_hour <= 6 and keywords & _URGENT_KEYWORDS:
             context_info['urgency'] = 'high'
             context_score += 0.1
         
@@ -310,69 +577,93 @@ class NaturalLanguageCommandParser:
         params = {}
         
         # 숫자 추출
-        numbers = re.findall(r'\d+', text)
+        numbers = _NUM_RE.findall(text)
         if numbers:
             params['numbers'] = [int(n) for n in numbers]
         
         # 시간 관련 키워드 추출
-        time_keywords = {
-            '어제': timedelta(days=1),
-            '일주일': timedelta(weeks=1),
-            '한달': timedelta(days=30),
-            '오늘': timedelta(days=0),
-            '최근': timedelta(days=7)
-        }
-        
-        for keyword, delta in time_keywords.items():
-            if keyword in text:
-                params['timeframe'] = keyword
-                params['time_delta'] = delta
-                break
+        time_match = _TIME_KW_RE.match(text)
+        if time_match:
+            keyword = time_match.group(time_match.lastindex)
+            params['timeframe'] = keyword
+            params['time_delta'] = _TIME_DELTAS[keyword]
         
         # 사용자 멘션 추출
-        mentions = re.findall(r'<@!?(\d+)>', text)
+        mentions = _MENTION_RE.findall(text)
         if mentions:
             params['mentioned_users'] = [int(uid) for uid in mentions]
         
         # 사용자명 추출 (간단한 패턴)
-        user_patterns = re.findall(r'(?:사용자|유저)\s*([가-힣a-zA-Z0-9_]+)', text)
+        user_patterns = _USER_RE.findall(text)
         if user_patterns:
             params['usernames'] = user_patterns
         
         # 채널 추출
-        channel_mentions = re.findall(r'<#(\d+)>', text)
+        channel_mentions = _CHAN_RE.findall(text)
         if channel_mentions:
             params['mentioned_channels'] = [int(cid) for cid in channel_mentions]
         
         # 보안 관련 키워드 추출
         if category == CommandCategory.SECURITY:
-            if '위험' in text:
+            keywords = _find_keywords(text)
+            if '위험' in keywords:
                 params['focus'] = 'risk'
-            elif '차단' in text:
+            elif '차단' in keywords:
                 params['action_type'] = 'ban'
-            elif '경고' in text:
+            elif '경고' in keywords:
                 params['action_type'] = 'warning'
         
         # 설정 관련 키워드 추출
         if category == CommandCategory.SETTINGS:
-            if '활성화' in text or '켜' in text:
+            keywords = _find_keywords(text)
+            if keywords & _ENABLE_KEYWORDS:
                 params['state'] = 'enable'
-            elif '비활성화' in text or '꺼' in text:
+            elif keywords & _DISABLE_KEYWORDS:
                 params['state'] = 'disable'
         
         return params
     
     def _add_to_history(self, command: ParsedCommand):
         """명령 히스토리에 추가"""
+        if self.command_history:
+            prev_key = self._cache_key(self.command_history[-1]['command'].original_text)
+            if prev_key in self._bigram or len(self._bigram) < self._bigram_max:
+                followups = self._bigram[prev_key]
+                next_text = self._normalize_text(command.original_text)
+                followups[next_text] += 1
+                
+                # 후속 명령 종류 수 제한 (방금 추가한 항목을 제외한 최저 빈도 항목 제거)
+                if len(followups) > self._bigram_followups_max:
+                    victim = min((text for text in followups if text != next_text),
+                                 key=followups.__getitem__)
+                    del followups[victim]
+        
         self.command_history.append({
-            'timestamp': datetime.now(),
+            'timestamp': time.time_ns(),
             'command': command,
             'success': None  # 실행 후 업데이트
         })
         
-        # 최대 100개 명령만 유지
-        if len(self.command_history) > 100:
-            self.command_history.pop(0)
+        # 다음에 올 가능성이 높은 명령을 미리 파싱해 캐시 예열
+        followups = self._bigram.get(self._cache_key(command.original_text))
+        if followups:
+            texts = [text for text, _ in followups.most_common(2)
+                     if self._cache_key(text) not in self._exact_cache]
+            if texts:
+                task = asyncio.create_task(self._prewarm(texts))
+                self._prewarm_tasks.add(task)
+                task.add_done_callback(self._prewarm_tasks.discard)
+    
+    async def _prewarm(self, texts: List[str]):
+        """예상 후속 명령을 백그라운드에서 파싱 (파싱 실패는 _ai_parse_command에서 로깅)"""
+        for text in texts:
+            # 사용자 요청이 대기 중이면 예열 중단
+            if self._gemini_sem.locked():
+                return
+            try:
+                await self._ai_parse_command(text, {})
+            except Exception as e:
+                logger.debug(f"명령 캐시 예열 실패: {e}")
     
     def update_command_result(self, success: bool):
         """최근 명령의 실행 결과 업데이트"""
@@ -381,32 +672,42 @@ class NaturalLanguageCommandParser:
     
     def get_command_suggestions(self, partial_text: str) -> List[str]:
         """명령어 자동완성 제안"""
-        suggestions = []
+        partial_lower = partial_text.lower()
+        suggestions = {}  # 삽입 순서를 유지하는 중복 제거용
         
         # 기본 패턴 기반 제안
-        for category_patterns in self.command_patterns.values():
-            for pattern_data in category_patterns:
-                pattern = pattern_data["pattern"]
-                # 패턴을 자연어 예시로 변환 (간단화)
-                example = pattern.replace(r".*", " ").replace(r"\.", "")
-                if partial_text.lower() in example.lower():
-                    suggestions.append(example)
+        for example, example_lower in self._example_cache:
+            if partial_lower in example_lower:
+                suggestions.setdefault(example, None)
         
         # 최근 명령 기반 제안
-        recent_texts = [h['command'].original_text for h in self.command_history[-10:]]
-        for recent in recent_texts:
-            if partial_text.lower() in recent.lower():
-                suggestions.append(recent)
-        
-        # 중복 제거 및 정렬
-        suggestions = list(set(suggestions))
-        suggestions.sort(key=lambda x: len(x))
+        recent_history = islice(self.command_history, max(0, len(self.command_history) - 10), None)
+        for entry in recent_history:
+            recent = entry['command'].original_text
+            if partial_lower in recent.lower():
+                suggestions.setdefault(recent, None)
         
-        return suggestions[:5]  # 최대 5개 제안
+        return heapq.nsmallest(5, suggestions, key=len)  # 짧은 순 최대 5개 제안
 
 class CommandExecutor:
     """명령 실행기"""
     
+    # 카테고리별 실행 메서드 이름
+    _HANDLERS = {
+        CommandCategory.SECURITY: '_execute_security_command',
+        CommandCategory.USER_MANAGEMENT: '_execute_user_management_command',
+        CommandCategory.STATISTICS: '_execute_statistics_command',
+        CommandCategory.AI_CONTROL: '_execute_ai_control_command',
+        CommandCategory.SYSTEM: '_execute_system_command',
+        CommandCategory.MONITORING: '_execute_monitoring_command',
+        CommandCategory.SETTINGS: '_execute_settings_command',
+        CommandCategory.MODERATION: '_execute_moderation_command',
+    }
+    
+    # 모더레이터 권한을 가지는 역할 이름
+    MOD_ROLES = frozenset({'모더레이터', 'Moderator', '관리자', 'Admin'})
+    _ADMIN_ONLY = frozenset({'관리자'})
+    
     def __init__(self, bot_instance, user_manager, ai_judge):
         self.bot = bot_instance
         self.user_manager = user_manager
@@ -414,15 +715,24 @@ class CommandExecutor:
         
         # 실행 권한 맵
         self.permission_map = {
-            CommandCategory.SECURITY: ['관리자', '모더레이터'],
-            CommandCategory.USER_MANAGEMENT: ['관리자', '모더레이터'],
-            CommandCategory.MODERATION: ['관리자', '모더레이터'],
-            CommandCategory.AI_CONTROL: ['관리자'],
-            CommandCategory.SYSTEM: ['관리자'],
-            CommandCategory.MONITORING: ['관리자', '모더레이터', '일반'],
-            CommandCategory.STATISTICS: ['관리자', '모더레이터', '일반'],
-            CommandCategory.SETTINGS: ['관리자']
+            CommandCategory.SECURITY: frozenset({'관리자', '모더레이터'}),
+            CommandCategory.USER_MANAGEMENT: frozenset({'관리자', '모더레이터'}),
+            CommandCategory.MODERATION: frozenset({'관리자', '모더레이터'}),
+            CommandCategory.AI_CONTROL: frozenset({'관리자'}),
+            CommandCategory.SYSTEM: frozenset({'관리자'}),
+            CommandCategory.MONITORING: frozenset({'관리자', '모더레이터', '일반'}),
+            CommandCategory.STATISTICS: frozenset({'관리자', '모더레이터', '일반'}),
+            CommandCategory.SETTINGS: frozenset({'관리자'})
         }
+        
+        # 짧은 시간 내 반복 조회용 통계 캐시 (캐시 시각, 값)
+        # user_manager의 통계는 길드 구분 없이 전체 사용자 기준이므로 단일 항목으로 유지
+        self._stats_cache: Optional[Tuple[float, dict]] = None
+        self._risk_users_cache: Optional[Tuple[float, list]] = None
+        self._stats_cache_ttl = 2.0
+        
+        # 이름 -> 멤버 ID 색인 (guild_id -> (name 색인, display_name 색인))
+        self._member_index: Dict[int, Tuple[Dict[str, int], Dict[str, int]]] = {}
     
     async def execute_command(self, command: ParsedCommand, 
                             ctx: discord.ext.commands.Context) -> Dict[str, Any]:
@@ -433,26 +743,13 @@ class CommandExecutor:
                 return {
                     'success': False,
                     'message': '❌ 이 명령을 실행할 권한이 없습니다.',
-                    'permission_required': self.permission_map.get(command.category, ['관리자'])
+                    'permission_required': sorted(self.permission_map.get(command.category, self._ADMIN_ONLY))
                 }
             
             # 카테고리별 명령 실행
-            if command.category == CommandCategory.SECURITY:
-                result = await self._execute_security_command(command, ctx)
-            elif command.category == CommandCategory.USER_MANAGEMENT:
-                result = await self._execute_user_management_command(command, ctx)
-            elif command.category == CommandCategory.STATISTICS:
-                result = await self._execute_statistics_command(command, ctx)
-            elif command.category == CommandCategory.AI_CONTROL:
-                result = await self._execute_ai_control_command(command, ctx)
-            elif command.category == CommandCategory.SYSTEM:
-                result = await self._execute_system_command(command, ctx)
-            elif command.category == CommandCategory.MONITORING:
-                result = await self._execute_monitoring_command(command, ctx)
-            elif command.category == CommandCategory.SETTINGS:
-                result = await self._execute_settings_command(command, ctx)
-            elif command.category == CommandCategory.MODERATION:
-                result = await self._execute_moderation_command(command, ctx)
+            handler_name = self._HANDLERS.get(command.category)
+            if handler_name:
+                result = await getattr(self, handler_name)(command, ctx)
             else:
                 result = {
                     'success': False,
@@ -474,36 +771,63 @@ class CommandExecutor:
     async def _check_permissions(self, command: ParsedCommand, 
                                ctx: discord.ext.commands.Context) -> bool:
         """권한 확인"""
-        required_permissions = self.permission_map.get(command.category, ['관리자'])
+        required = self.permission_map.get(command.category, self._ADMIN_ONLY)
+        
+        # 일반 사용자 허용 명령 (소유자 확인 등 비용이 드는 검사 전에 판정)
+        if '일반' in required:
+            return True
+        
+        author = ctx.author
         
         # 봇 소유자는 모든 권한
-        if await ctx.bot.is_owner(ctx.author):
+        if await ctx.bot.is_owner(author):
             return True
         
         # 서버 관리자
-        if ctx.author.guild_permissions.administrator:
+        if author.guild_permissions.administrator:
             return True
         
         # 모더레이터 권한 (역할 기반)
-        if '모더레이터' in required_permissions:
-            mod_roles = ['모더레이터', 'Moderator', '관리자', 'Admin']
-            if any(role.name in mod_roles for role in ctx.author.roles):
+        if '모더레이터' in required:
+            role_names = frozenset(role.name for role in author.roles)
+            if self.MOD_ROLES & role_names:
                 return True
         
-        # 일반 사용자 허용 명령
-        if '일반' in required_permissions:
-            return True
-        
         return False
     
+    def _get_user_statistics(self) -> Dict[str, Any]:
+        """사용자 통계 조회 (짧은 TTL 캐시)"""
+        cached = self._stats_cache
+        if cached and time.monotonic() - cached[0] < self._stats_cache_ttl:
+            return cached[1]
+        
+        stats = self.user_manager.get_user_statistics()
+        self._stats_cache = (time.monotonic(), stats)
+        return stats
+    
+    async def _get_risk_users(self) -> list:
+        """위험 사용자 목록 조회 (짧은 TTL 캐시)"""
+        cached = self._risk_users_cache
+        if cached and time.monotonic() - cached[0] < self._stats_cache_ttl:
+            return cached[1]
+        
+        risk_users = await self.user_manager.get_risk_users()
+        self._risk_users_cache = (time.monotonic(), risk_users)
+        return risk_users
+    
+    def _invalidate_stats_cache(self):
+        """사용자 상태 변경 시 통계 캐시 무효화"""
+        self._stats_cache = None
+        self._risk_users_cache = None
+    
     async def _execute_security_command(self, command: ParsedCommand, 
                                       ctx: discord.ext.commands.Context) -> Dict[str, Any]:
         """보안 관련 명령 실행"""
         if command.intent == CommandIntent.QUERY:
             if '상태' in command.original_text:
                 # 보안 상태 조회
-                stats = self.user_manager.get_user_statistics()
-                risk_users = await self.user_manager.get_risk_users()
+                stats = self._get_user_statistics()
+                risk_users = await self._get_risk_users()
                 
                 embed = discord.Embed(title="🛡️ 보안 상태", color=discord.Color.green())
                 embed.add_field(name="총 사용자", value=stats.get('총사용자수', 0), inline=True)
@@ -515,7 +839,7 @@ class CommandExecutor:
                 
             elif '위험' in command.original_text:
                 # 위험 사용자 조회
-                risk_users = await self.user_manager.get_risk_users()
+                risk_users = await self._get_risk_users()
                 
                 if not risk_users:
                     await ctx.send("✅ 현재 위험 사용자가 없습니다.")
@@ -547,7 +871,7 @@ class CommandExecutor:
             target_user = ctx.guild.get_member(user_id)
         elif command.parameters.get('usernames'):
             username = command.parameters['usernames'][0]
-            target_user = discord.utils.get(ctx.guild.members, name=username)
+            target_user = self._lookup_member(ctx.guild, username, match_display=False)
         
         if not target_user and command.intent != CommandIntent.QUERY:
             return {'success': False, 'message': '❌ 대상 사용자를 찾을 수 없습니다.'}
@@ -569,7 +893,7 @@ class CommandExecutor:
                 return {'success': True, 'message': '사용자 정보를 조회했습니다.'}
             else:
                 # 전체 사용자 통계
-                stats = self.user_manager.get_user_statistics()
+                stats = self._get_user_statistics()
                 embed = discord.Embed(title="📊 사용자 통계", color=discord.Color.blue())
                 
                 for key, value in stats.items():
@@ -582,6 +906,7 @@ class CommandExecutor:
             if '경고' in command.original_text and '초기화' in command.original_text:
                 # 경고 초기화
                 await self.user_manager.update_trust_score(target_user.id, 0, "관리자 경고 초기화")
+                self._invalidate_stats_cache()
                 await ctx.send(f"✅ {target_user.mention}의 경고를 초기화했습니다.")
                 return {'success': True, 'message': '경고를 초기화했습니다.'}
             
@@ -589,6 +914,7 @@ class CommandExecutor:
                 # 사용자 차단
                 reason = command.parameters.get('reason', '관리자 명령')
                 await target_user.ban(reason=reason)
+                self._invalidate_stats_cache()
                 await ctx.send(f"🔨 {target_user.mention}을 차단했습니다. 사유: {reason}")
                 return {'success': True, 'message': '사용자를 차단했습니다.'}
         
@@ -598,7 +924,7 @@ class CommandExecutor:
                                         ctx: discord.ext.commands.Context) -> Dict[str, Any]:
         """통계 관련 명령 실행"""
         if command.intent == CommandIntent.QUERY or command.intent == CommandIntent.ANALYZE:
-            stats = self.user_manager.get_user_statistics()
+            stats = self._get_user_statistics()
             
             embed = discord.Embed(title="📈 서버 통계", color=discord.Color.green())
             
@@ -687,8 +1013,48 @@ class CommandExecutor:
             return guild.get_member(int(identifier))
         
         # 이름으로 찾기
-        return discord.utils.get(guild.members, name=identifier) or \
-               discord.utils.get(guild.members, display_name=identifier)
+        return self._lookup_member(guild, identifier)
+    
+    def _lookup_member(self, guild: discord.Guild, identifier: str,
+                       match_display: bool = True) -> Optional[discord.Member]:
+        """색인으로 멤버 찾기 (결과를 실제 이름과 대조하고, 불일치/미발견 시 한 번 재구축)"""
+        for attempt in range(2):
+            by_name, by_display = self._get_member_index(guild)
+            
+            member_id = by_name.get(identifier)
+            member = guild.get_member(member_id) if member_id else None
+            if member and member.name == identifier:
+                return member
+            
+            if match_display:
+                member_id = by_display.get(identifier)
+                member = guild.get_member(member_id) if member_id else None
+                if member and member.display_name == identifier:
+                    return member
+            
+            # 색인이 오래되었을 수 있으므로 재구축 후 재시도
+            if attempt == 0:
+                self.invalidate_member_index(guild.id)
+        
+        return None
+    
+    def _get_member_index(self, guild: discord.Guild) -> Tuple[Dict[str, int], Dict[str, int]]:
+        """길드 멤버 이름 색인 반환 (없으면 생성)"""
+        index = self._member_index.get(guild.id)
+        if index is None:
+            by_name: Dict[str, int] = {}
+            by_display: Dict[str, int] = {}
+            for member in guild.members:
+                # 기존 discord.utils.get과 같이 먼저 나온 멤버 우선
+                by_name.setdefault(member.name, member.id)
+                by_display.setdefault(member.display_name, member.id)
+            index = (by_name, by_display)
+            self._member_index[guild.id] = index
+        return index
+    
+    def invalidate_member_index(self, guild_id: int):
+        """멤버 변동 시 이름 색인 무효화"""
+        self._member_index.pop(guild_id, None)
 
 # 전역 자연어 처리 시스템 인스턴스
 natural_language_parser = None
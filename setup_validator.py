@@ -4,52 +4,201 @@
 """
 Discord 보안봇 설정 검증 도구
 사용자가 봇을 실행하기 전에 필요한 모든 설정을 확인합니다.
+
+사용법:
+  python setup_validator.py          # 전체 검증 (파일 변경이 없으면 파일 검사는 이전 결과 사용)
+  python setup_validator.py --fast   # .env와 필수 파일만 빠르게 확인 (.env 수정 후)
+  python setup_validator.py --full   # 이전 결과를 무시하고 전체 검증
 """
 
-import os
 import sys
-import importlib
+
+# 지원하지 않는 Python에서는 다른 모듈을 불러오기 전에 즉시 종료
+if sys.version_info < (3, 8):
+    sys.exit("❌ Python 3.8 이상이 필요합니다! (현재 버전: %d.%d.%d)" % sys.version_info[:3])
+
+import argparse
+import io
+import os
+import json
+import hashlib
+import stat
+import threading
+import importlib.util
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-def check_python_version():
-    """Python 버전 확인"""
-    print("🐍 Python 버전 확인 중...")
-    version = sys.version_info
-    
-    if version.major < 3 or (version.major == 3 and version.minor < 8):
-        print("❌ Python 3.8 이상이 필요합니다!")
-        print(f"   현재 버전: {version.major}.{version.minor}.{version.micro}")
+HEADER = """\
+==================================================
+🛡️ Discord 보안봇 설정 검증 도구
+==================================================
+"""
+
+PASS_FOOTER = """
+==================================================
+🎉 모든 검증 통과! 봇을 실행할 수 있습니다.
+
+실행 방법:
+  run_discord_bot.bat
+또는:
+  python discord_bot.py
+==================================================
+"""
+
+FAIL_FOOTER = """
+==================================================
+⚠️ 일부 검증 실패. 위의 문제들을 해결하세요.
+
+도움이 필요하면 SETUP_GUIDE.md를 확인하세요.
+==================================================
+"""
+
+# .env에서 확인할 두 키만 찾는 정규식 (같은 키가 여러 번 있으면 마지막 값 사용)
+# (python-dotenv와 같이 'export ' 접두사 허용)
+_ENV_RE = re.compile(rb'^[ \t]*(?:export[ \t]+)?(DISCORD_TOKEN|GEMINI_API_KEY)[ \t]*=[ \t]*(.*?)[ \t\r]*$', re.M)
+
+# 따옴표 없는 값의 인라인 주석 (공백 뒤 '#'부터 끝까지)
+_ENV_INLINE_COMMENT_RE = re.compile(rb'[ \t]+#.*$')
+
+# 마지막으로 통과한 파일 시스템 검사의 입력 상태 기록 파일
+CACHE_FILE = '.setup_validator_cache.json'
+
+# 봇 실행에 필요한 소스 파일
+REQUIRED_FILES = [
+    'discord_bot.py',
+    'core_ai_system.py',
+    'advanced_user_system.py',
+    'natural_language_command_system.py'
+]
+
+# 봇이 사용하는 데이터베이스 파일
+DATABASE_FILE = 'security_bot.db'
+
+# 검증 결과에 영향을 주는 파일 (변경 시 캐시 무효화)
+WATCHED_FILES = ['.env', 'requirements.txt', *REQUIRED_FILES, DATABASE_FILE]
+
+def _safe_stat(path):
+    """파일 정보 반환 (없으면 None)"""
+    try:
+        return os.stat(path)
+    except OSError:
+        return None
+
+def _collect_file_stats():
+    """감시 대상 파일마다 os.stat을 한 번씩만 수행"""
+    return {file_name: _safe_stat(file_name) for file_name in WATCHED_FILES}
+
+def _validation_cache_key(stats):
+    """Python 인터프리터/환경과 관련 파일 수정 시각으로 캐시 키 생성"""
+    state = [tuple(sys.version_info), sys.executable, sys.prefix]
+    for file_name in WATCHED_FILES:
+        st = stats.get(file_name)
+        state.append((file_name, st.st_mtime_ns if st else None))
+    return hashlib.blake2b(repr(state).encode()).hexdigest()
+
+def _has_cached_pass(key):
+    """같은 상태에서 이미 검증을 통과했는지 확인"""
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        return cached.get('key') == key and cached.get('status') == 'ok'
+    except (OSError, ValueError):
         return False
-    else:
-        print(f"✅ Python {version.major}.{version.minor}.{version.micro} (적합)")
+
+def _save_cached_pass(key):
+    """검증 통과 상태 기록"""
+    try:
+        with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'status': 'ok'}, f)
+    except OSError:
+        pass
+
+class _ThreadBufferedStdout:
+    """스레드별 출력 버퍼 (병렬 검사의 출력이 섞이지 않도록)"""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+    
+    def write(self, text):
+        buffer = getattr(self._local, 'buffer', None)
+        return (buffer if buffer is not None else self.stream).write(text)
+    
+    def flush(self):
+        self.stream.flush()
+    
+    def run(self, check_name, check_func):
+        """검사를 실행하고 (출력, 결과) 반환"""
+        self._local.buffer = io.StringIO()
+        try:
+            result = check_func()
+        except Exception as e:
+            print(f"❌ {check_name} 검사 중 오류: {e}")
+            result = False
+        finally:
+            output = self._local.buffer.getvalue()
+            self._local.buffer = None
+        return output, result
+
+# 봇 모듈이 시작 시 바로 임포트하는 패키지 (없으면 실행 불가)
+CRITICAL_PACKAGES = {
+    'discord': 'discord.py',
+    'google.generativeai': 'google-generativeai',
+    'aiohttp': 'aiohttp',
+    'numpy': 'numpy',
+    'psutil': 'psutil',
+    'requests': 'requests',
+    'dotenv': 'python-dotenv'
+}
+
+# 부가 기능용 패키지 (없어도 봇 실행 가능, 경고만 표시)
+OPTIONAL_PACKAGES = {
+    'matplotlib': 'matplotlib',
+    'PIL': 'Pillow'
+}
+
+def _probe_package(module_name):
+    """모듈 코드를 실행하지 않고 설치 여부만 확인"""
+    # 이미 임포트된 모듈이면 탐색 생략
+    if module_name in sys.modules:
         return True
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        # 상위 패키지가 없으면 ModuleNotFoundError 발생
+        return False
 
 def check_required_packages():
     """필수 패키지 확인"""
     print("\n📦 필수 패키지 확인 중...")
     
-    required_packages = {
-        'discord': 'discord.py',
-        'google.generativeai': 'google-generativeai',
-        'aiohttp': 'aiohttp',
-        'numpy': 'numpy',
-        'matplotlib': 'matplotlib',
-        'PIL': 'Pillow',
-        'psutil': 'psutil',
-        'requests': 'requests',
-        'dotenv': 'python-dotenv'
-    }
+    packages = {**CRITICAL_PACKAGES, **OPTIONAL_PACKAGES}
     
-    missing_packages = []
+    # 패키지 확인을 병렬로 수행 (출력은 정의 순서 유지)
+    with ThreadPoolExecutor(max_workers=len(packages)) as executor:
+        installed = dict(zip(packages, executor.map(_probe_package, packages)))
     
-    for module_name, package_name in required_packages.items():
-        try:
-            importlib.import_module(module_name)
+    missing_packages = []
+    for module_name, package_name in CRITICAL_PACKAGES.items():
+        if installed[module_name]:
             print(f"✅ {package_name}")
-        except ImportError:
+        else:
             print(f"❌ {package_name} (누락)")
             missing_packages.append(package_name)
     
+    missing_optional = []
+    for module_name, package_name in OPTIONAL_PACKAGES.items():
+        if installed[module_name]:
+            print(f"✅ {package_name} (선택)")
+        else:
+            print(f"⚠️ {package_name} (선택, 누락)")
+            missing_optional.append(package_name)
+    
+    if missing_optional:
+        print(f"\nℹ️ 선택 패키지는 해당 기능을 사용할 때만 필요합니다: pip install {' '.join(missing_optional)}")
+    
     if missing_packages:
         print(f"\n⚠️ 누락된 패키지를 설치하세요:")
         print(f"pip install {' '.join(missing_packages)}")
@@ -59,26 +208,53 @@ def check_required_packages():
     
     return True
 
-def check_env_file():
+def _parse_env_keys(data):
+    """.env 내용(bytes)에서 필요한 키의 값만 추출"""
+    values = {}
+    for name, value in _ENV_RE.findall(data):
+        quote = value[:1]
+        if quote in (b'"', b"'") and value.find(quote, 1) != -1:
+            # 따옴표 값: 닫는 따옴표까지만 사용 (뒤의 주석 무시)
+            value = value[1:value.find(quote, 1)]
+        else:
+            value = _ENV_INLINE_COMMENT_RE.sub(b'', value)
+        values[name.decode()] = value.decode('utf-8', errors='replace')
+    return values
+
+def check_env_file(stats=None):
     """환경변수 파일 확인"""
     print("\n🔐 환경설정 파일 확인 중...")
     
-    env_path = Path('.env')
-    if not env_path.exists():
+    # 이미 수집한 파일 정보 재사용
+    env_stat = stats.get('.env') if stats is not None else _safe_stat('.env')
+    env_file = None
+    if env_stat is not None:
+        try:
+            env_file = open('.env', 'rb')
+        except FileNotFoundError:
+            pass
+    
+    if env_file is None:
         print("❌ .env 파일이 없습니다!")
         print("   .env.example을 복사해서 .env 파일을 만드세요:")
         print("   copy .env.example .env")
         return False
     
+    if env_stat.st_size == 0:
+        env_file.close()
+        print("❌ .env 파일이 비어 있습니다!")
+        print("   DISCORD_TOKEN과 GEMINI_API_KEY를 추가하세요")
+        return False
+    
     print("✅ .env 파일 존재")
     
-    # .env 파일 내용 확인
+    # .env 파일 내용 확인 (필요한 두 키만 정규식으로 추출)
     try:
-        from dotenv import load_dotenv
-        load_dotenv()
+        with env_file:
+            values = _parse_env_keys(env_file.read())
         
-        discord_token = os.getenv('DISCORD_TOKEN')
-        gemini_key = os.getenv('GEMINI_API_KEY')
+        discord_token = values.get('DISCORD_TOKEN')
+        gemini_key = values.get('GEMINI_API_KEY')
         
         if not discord_token or discord_token == 'your_discord_bot_token_here':
             print("❌ DISCORD_TOKEN이 설정되지 않았습니다!")
@@ -96,22 +272,18 @@ def check_env_file():
         print(f"❌ .env 파일 읽기 오류: {e}")
         return False
 
-def check_required_files():
+def check_required_files(stats=None):
     """필수 파일 확인"""
     print("\n📁 필수 파일 확인 중...")
     
-    required_files = [
-        'discord_bot.py',
-        'core_ai_system.py', 
-        'advanced_user_system.py',
-        'natural_language_command_system.py'
-    ]
+    if stats is None:
+        stats = {file_name: _safe_stat(file_name) for file_name in REQUIRED_FILES}
     
     all_files_exist = True
     
-    for file_name in required_files:
-        file_path = Path(file_name)
-        if file_path.exists():
+    for file_name in REQUIRED_FILES:
+        st = stats.get(file_name)
+        if st is not None and stat.S_ISREG(st.st_mode):
             print(f"✅ {file_name}")
         else:
             print(f"❌ {file_name} (누락)")
@@ -119,62 +291,103 @@ def check_required_files():
     
     return all_files_exist
 
-def test_database():
+def test_database(stats=None):
     """데이터베이스 연결 테스트"""
     print("\n🗄️ 데이터베이스 연결 테스트 중...")
     
+    db_stat = stats.get(DATABASE_FILE) if stats is not None else _safe_stat(DATABASE_FILE)
+    if db_stat is None:
+        # 봇이 시작할 때 생성하므로 실패로 보지 않음
+        print("ℹ️ 데이터베이스 파일 없음 (첫 실행 시 자동 생성됩니다)")
+        return True
+    
     try:
-        import sqlite3
-        conn = sqlite3.connect('security_bot.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT 1')
+        # 읽기 전용 URI 모드로 열어 파일을 새로 만들거나 수정하지 않도록 함
+        db_uri = Path(DATABASE_FILE).resolve().as_uri() + '?mode=ro'
+        conn = sqlite3.connect(db_uri, uri=True)
         conn.close()
         print("✅ 데이터베이스 연결 성공")
         return True
+    except sqlite3.OperationalError as e:
+        if _safe_stat(DATABASE_FILE) is None:
+            print("ℹ️ 데이터베이스 파일 없음 (첫 실행 시 자동 생성됩니다)")
+            return True
+        print(f"❌ 데이터베이스 오류: {e}")
+        return False
     except Exception as e:
         print(f"❌ 데이터베이스 오류: {e}")
         return False
 
-def main():
+def parse_args(argv=None):
+    """명령줄 인자 파싱"""
+    parser = argparse.ArgumentParser(description="Discord 보안봇 설정 검증 도구")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--fast', action='store_true',
+                      help='패키지와 데이터베이스 검사 생략 (.env 수정 후 빠른 확인용)')
+    mode.add_argument('--full', action='store_true',
+                      help='이전 파일 검사 결과를 무시하고 모든 검사 수행')
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """메인 검증 함수"""
-    print("=" * 50)
-    print("🛡️ Discord 보안봇 설정 검증 도구")
-    print("=" * 50)
+    args = parse_args(argv)
+    sys.stdout.write(HEADER)
     
+    # 관련 파일 정보를 한 번만 수집해 캐시 키와 각 검사에서 공유
+    file_stats = _collect_file_stats()
+    
+    # 수 밀리초면 끝나는 파일 시스템 검사 (메인 스레드에서 실행)
     checks = [
-        ("Python 버전", check_python_version),
-        ("필수 패키지", check_required_packages), 
-        ("환경설정", check_env_file),
-        ("필수 파일", check_required_files),
-        ("데이터베이스", test_database)
+        ("환경설정", lambda: check_env_file(file_stats)),
+        ("필수 파일", lambda: check_required_files(file_stats))
     ]
+    if not args.fast:
+        checks.append(("데이터베이스", lambda: test_database(file_stats)))
+    
+    run_packages = not args.fast
     
     all_passed = True
     
-    for check_name, check_func in checks:
-        try:
-            result = check_func()
-            if not result:
-                all_passed = False
-        except Exception as e:
-            print(f"❌ {check_name} 검사 중 오류: {e}")
-            all_passed = False
+    # 마지막 통과 이후 파일 변경이 없으면 파일 시스템 검사만 생략
+    # (패키지 설치 상태는 파일 수정 시각에 반영되지 않으므로 패키지 검사는 항상 수행)
+    cache_key = _validation_cache_key(file_stats)
+    cached_pass = not args.full and _has_cached_pass(cache_key)
+    if cached_pass:
+        print("✅ 파일 검사: 이전 결과 사용 (마지막 통과 이후 변경 없음)")
+        checks = []
     
-    print("\n" + "=" * 50)
+    # 가장 오래 걸리는 패키지 검사를 먼저 백그라운드로 시작하고,
+    # 그동안 나머지 검사를 수행 (출력은 원래 순서대로 표시)
+    stdout = _ThreadBufferedStdout(sys.stdout)
+    sys.stdout = stdout
+    try:
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            package_future = None
+            if run_packages:
+                package_future = executor.submit(stdout.run, "필수 패키지", check_required_packages)
+            outcomes = [stdout.run(check_name, check_func) for check_name, check_func in checks]
+            if package_future:
+                outcomes.insert(0, package_future.result())
+    finally:
+        sys.stdout = stdout.stream
     
-    if all_passed:
-        print("🎉 모든 검증 통과! 봇을 실행할 수 있습니다.")
-        print("\n실행 방법:")
-        print("  run_discord_bot.bat")
-        print("또는:")
-        print("  python discord_bot.py")
-    else:
-        print("⚠️ 일부 검증 실패. 위의 문제들을 해결하세요.")
-        print("\n도움이 필요하면 SETUP_GUIDE.md를 확인하세요.")
+    # 모든 검사 출력을 한 번에 기록
+    sys.stdout.write(''.join(output for output, _ in outcomes))
+    if not all(result for _, result in outcomes):
+        all_passed = False
+    
+    # 파일 시스템 검사를 모두 수행해 통과한 경우에만 결과 기록
+    file_results = outcomes[1:] if package_future else outcomes
+    if checks and not args.fast and all(result for _, result in file_results):
+        _save_cached_pass(cache_key)
+    
+    sys.stdout.write(PASS_FOOTER if all_passed else FAIL_FOOTER)
     
-    print("=" * 50)
+    # 대화형 터미널에서만 종료 전 대기 (CI/자동화 환경에서 멈추지 않도록)
+    if not os.environ.get('CI') and sys.stdin.isatty() and sys.stdout.isatty():
+        input("\nPress Enter to exit...")
     
-    input("\nPress Enter to exit...")
+    return all_passed
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(0 if main() else 1)
\ No newline at end of file